@@ -12,20 +12,57 @@ from collections import Counter, defaultdict
 import sqlite3
 import glob
 import chess.pgn
+import chess.polyglot
 import time
 import argparse
 import shutil
+from pathlib import Path
 
+# Add the src directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-## Legacy JSON builder removed: only SQLite DB output is supported
+# .bin books: fixed-size (uint64 zobrist, uint16 move) records sorted by key,
+# memory-mapped and binary searched by the book engines
+from engines._book import _encode_move, _signed_zobrist, _write_bin
 
 
-def build_book_sqlite(pgn_paths, outpath, keep_singletons: bool = False):
-    """Build an on-disk sqlite3 book by counting moves per Zobrist hash and storing the most-played move.
+## Legacy JSON builder removed: books are written as SQLite DB, optionally with a .bin copy
+
+
+def export_book_bin(db_path, bin_path=None):
+    """Convert a sqlite book (FEN or Zobrist keyed) into a sorted .bin book next to it."""
+    if bin_path is None:
+        bin_path = os.path.splitext(db_path)[0] + '.bin'
+    conn = sqlite3.connect(f'file:{os.path.abspath(db_path)}?mode=ro', uri=True)
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table';")}
+    table = 'book' if 'book' in tables else 'rare_book'
+    print(f"[export_book_bin] Reading table '{table}' from {db_path}...", flush=True)
+    records = {}
+    for key, uci in conn.execute(f"SELECT hash, move FROM {table};"):
+        try:
+            if isinstance(key, int):
+                h = key & 0xFFFFFFFFFFFFFFFF
+            else:
+                h = chess.polyglot.zobrist_hash(chess.Board(key + ' 0 1'))
+            records[h] = _encode_move(chess.Move.from_uci(uci))
+        except Exception:
+            # skip rows that do not describe a valid position/move
+            continue
+    conn.close()
+    _write_bin(records, bin_path)
+    print(f"[export_book_bin] Wrote {len(records)} positions to {bin_path}", flush=True)
+    return bin_path
+
+
+def build_book_sqlite(pgn_paths, outpath, keep_singletons: bool = False, zobrist_keys: bool = False):
+    """Build an on-disk sqlite3 book by counting moves per position and storing the most-played move.
+    Positions are keyed by the normalized FEN (first 4 fields), or by the signed polyglot
+    Zobrist hash when zobrist_keys is set.
     Schema:
-      counts(hash INTEGER, move TEXT, count INTEGER, PRIMARY KEY(hash, move))
-      book(hash INTEGER PRIMARY KEY, move TEXT)
+      counts(hash TEXT|INTEGER, move TEXT, count INTEGER, PRIMARY KEY(hash, move))
+      book(hash TEXT|INTEGER PRIMARY KEY, move TEXT)
     """
+    key_type = "INTEGER" if zobrist_keys else "TEXT"
     outdir = os.path.dirname(outpath)
     if outdir and not os.path.exists(outdir):
         os.makedirs(outdir, exist_ok=True)
@@ -34,7 +71,7 @@ def build_book_sqlite(pgn_paths, outpath, keep_singletons: bool = False):
     cur = conn.cursor()
     cur.execute("PRAGMA journal_mode = OFF;")
     cur.execute("PRAGMA synchronous = OFF;")
-    cur.execute("CREATE TABLE IF NOT EXISTS counts(hash TEXT, move TEXT, count INTEGER, PRIMARY KEY(hash, move));")
+    cur.execute(f"CREATE TABLE IF NOT EXISTS counts(hash {key_type}, move TEXT, count INTEGER, PRIMARY KEY(hash, move));")
     conn.commit()
 
     insert_sql = "INSERT INTO counts(hash, move, count) VALUES (?, ?, 1) ON CONFLICT(hash, move) DO UPDATE SET count = count + 1;"
@@ -63,8 +100,12 @@ def build_book_sqlite(pgn_paths, outpath, keep_singletons: bool = False):
                 for move in game.mainline_moves():
                     # Use a normalized FEN (first 4 fields) as the position key. This
                     # is human-readable and avoids integer wrapping issues across
-                    # different sqlite/python builds.
-                    key = ' '.join(board.fen().split(' ')[:4])
+                    # different sqlite/python builds. Zobrist keys are folded into
+                    # the signed range so they round-trip through sqlite intact.
+                    if zobrist_keys:
+                        key = _signed_zobrist(board)
+                    else:
+                        key = ' '.join(board.fen().split(' ')[:4])
                     u = move.uci()
                     cur.execute(insert_sql, (key, u))
                     ops += 1
@@ -99,7 +140,7 @@ def build_book_sqlite(pgn_paths, outpath, keep_singletons: bool = False):
 
     print("[build_book_sqlite] Aggregating most-played move per position into table 'book'...", flush=True)
     cur.execute("DROP TABLE IF EXISTS book;")
-    cur.execute("CREATE TABLE book(hash TEXT PRIMARY KEY, move TEXT);")
+    cur.execute(f"CREATE TABLE book(hash {key_type} PRIMARY KEY, move TEXT);")
     if keep_singletons:
         cur.execute(
             "INSERT OR REPLACE INTO book(hash, move)\n"
@@ -118,7 +159,7 @@ def build_book_sqlite(pgn_paths, outpath, keep_singletons: bool = False):
     if getattr(build_book_sqlite, "dump_rare_openings", False):
         print("[build_book_sqlite] Aggregating least-played move per position into table 'rare_book'...", flush=True)
         cur.execute("DROP TABLE IF EXISTS rare_book;")
-        cur.execute("CREATE TABLE rare_book(hash TEXT PRIMARY KEY, move TEXT);")
+        cur.execute(f"CREATE TABLE rare_book(hash {key_type} PRIMARY KEY, move TEXT);")
         # Only keep positions seen more than once (prune singletons)
         cur.execute(
             "INSERT OR REPLACE INTO rare_book(hash, move)\n"
@@ -134,7 +175,7 @@ def build_book_sqlite(pgn_paths, outpath, keep_singletons: bool = False):
         rare_conn = sqlite3.connect(rare_db_path)
         rare_cur = rare_conn.cursor()
         rare_cur.execute("DROP TABLE IF EXISTS rare_book;")
-        rare_cur.execute("CREATE TABLE rare_book(hash TEXT PRIMARY KEY, move TEXT);")
+        rare_cur.execute(f"CREATE TABLE rare_book(hash {key_type} PRIMARY KEY, move TEXT);")
         for row in cur.execute("SELECT hash, move FROM rare_book;"):
             rare_cur.execute("INSERT INTO rare_book(hash, move) VALUES (?, ?);", row)
         rare_conn.commit()
@@ -160,13 +201,20 @@ def build_book_sqlite(pgn_paths, outpath, keep_singletons: bool = False):
 
 
 def main():
-    parser = argparse.ArgumentParser(description='Build an opening book from PGN files. Outputs sqlite .db only.')
+    parser = argparse.ArgumentParser(description='Build an opening book from PGN files. Outputs a sqlite .db, plus a memory-mappable .bin copy with --bin; --bin-from converts an existing .db.')
     parser.add_argument('outpath', nargs='?', help='Output path (.db). If omitted defaults to src/engines/book/opening_book.db')
     parser.add_argument('pgns', nargs='*', help='List of PGN files to read (defaults to scripts/pgns/*.pgn)')
     parser.add_argument('--keep-singletons', action='store_true', help='Do not prune positions that only occur once (default: prune)')
     parser.add_argument('--rare-openings', action='store_true', help='Dump least played move per position to a rare-opening-book DB')
+    parser.add_argument('--zobrist', action='store_true', help='Key positions by polyglot Zobrist hash (INTEGER) instead of FEN text')
+    parser.add_argument('--bin', action='store_true', help='Also write a memory-mappable .bin copy of each built book')
+    parser.add_argument('--bin-from', metavar='DB', help='Convert an existing .db book to .bin and exit')
     args = parser.parse_args()
 
+    if args.bin_from:
+        export_book_bin(args.bin_from)
+        return
+
     # Default input folder: scripts/pgns/*.pgn
     default_pgn_dir = os.path.join(os.path.dirname(__file__), 'pgns')
     default_db = os.path.join(os.path.dirname(__file__), '..', 'src', 'engines', 'book', 'opening_book.db')
@@ -186,8 +234,12 @@ def main():
     print(f"Building book from {len(pgns)} PGN files...", flush=True)
     # Set feature flag for rare openings
     build_book_sqlite.dump_rare_openings = args.rare_openings
-    build_book_sqlite(pgns, outpath, keep_singletons=args.keep_singletons)
+    build_book_sqlite(pgns, outpath, keep_singletons=args.keep_singletons, zobrist_keys=args.zobrist)
     print(f"Wrote sqlite book to {outpath}", flush=True)
+    if args.bin:
+        export_book_bin(outpath)
+        if args.rare_openings:
+            export_book_bin(outpath.replace('.db', '_rare.db'))
 
 if __name__ == '__main__':
     main()
@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 """
 Entry point for the Single Player chess engine.
-Looks 4 moves ahead, only considers its own moves.
+Material-only alpha-beta search with iterative deepening that assumes the
+opponent answers with its best reply.
 """
 import sys
+import argparse
+import multiprocessing
 from pathlib import Path
 
 # Add the src directory to the path
@@ -12,8 +15,15 @@ sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 from engines.single_player_engine import SinglePlayerEngine
 
 def main():
-    engine = SinglePlayerEngine()
+    parser = argparse.ArgumentParser(description='Single Player UCI engine')
+    # opt-in: GUST usually runs several engines side by side on one machine
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Processes searching root moves side by side (default: 1, in-process)')
+    args = parser.parse_args()
+    engine = SinglePlayerEngine(workers=args.workers)
     engine.uci_loop()
 
 if __name__ == "__main__":
+    # the worker processes re-launch this executable when frozen
+    multiprocessing.freeze_support()
     main()
@@ -69,6 +69,11 @@ class BaseUCIEngine(ABC):
     def handle_ucinewgame(self):
         """Handle new game."""
         self.board = chess.Board()
+        self.on_new_game()
+    
+    def on_new_game(self):
+        """Reset state kept across moves of one game. Override in subclasses."""
+        pass
     
     def handle_position(self, args):
         """Handle position setup."""
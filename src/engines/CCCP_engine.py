@@ -20,17 +20,23 @@ class CCCPEngine(BaseUCIEngine):
         super().__init__("CCCP Engine", "Laurent Aerens")
 
     def get_best_move(self, think_time: float = 0):
-        time.sleep(min(think_time, 0.1))
+        if think_time > 0:
+            time.sleep(min(think_time, 0.1))
         legal_moves = list(self.board.legal_moves)
         if not legal_moves:
             return None
+        if len(legal_moves) == 1:
+            return legal_moves[0]
+        # Checkmate implies check, so only checking moves need to be played out
+        checking_moves = [m for m in legal_moves if self.board.gives_check(m)]
         # 1. Checkmate moves
         knight_checkmate_moves = []
         queen_checkmate_moves = []
-        for move in legal_moves:
-            b = self.board.copy()
-            b.push(move)
-            if b.is_checkmate():
+        for move in checking_moves:
+            self.board.push(move)
+            is_checkmate = self.board.is_checkmate()
+            self.board.pop()
+            if is_checkmate:
                 if move.promotion == chess.KNIGHT:
                     knight_checkmate_moves.append(move)
                 elif move.promotion == chess.QUEEN or move.promotion is None:
@@ -42,14 +48,11 @@ class CCCPEngine(BaseUCIEngine):
         # 2. Check moves
         knight_check_moves = []
         queen_check_moves = []
-        for move in legal_moves:
-            b = self.board.copy()
-            b.push(move)
-            if b.is_check():
-                if move.promotion == chess.KNIGHT:
-                    knight_check_moves.append(move)
-                elif move.promotion == chess.QUEEN or move.promotion is None:
-                    queen_check_moves.append(move)
+        for move in checking_moves:
+            if move.promotion == chess.KNIGHT:
+                knight_check_moves.append(move)
+            elif move.promotion == chess.QUEEN or move.promotion is None:
+                queen_check_moves.append(move)
         if knight_check_moves:
             return random.choice(knight_check_moves)
         if queen_check_moves:
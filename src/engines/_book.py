@@ -0,0 +1,342 @@
+"""Book storage helpers shared by the opening book engines and scripts/build_opening_book.py."""
+import chess
+import chess.polyglot
+import atexit
+import bisect
+import contextlib
+import gzip
+import hashlib
+import json
+import mmap
+import os
+import queue
+import random
+import sqlite3
+import struct
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+
+def _signed_zobrist(board):
+    """Polyglot Zobrist key folded into SQLite's signed 64-bit INTEGER range."""
+    h = chess.polyglot.zobrist_hash(board)
+    return h - (1 << 64) if h & (1 << 63) else h
+
+# Read-only connections shared by every engine instance in this process, keyed
+# by the DB's real path so symlinked or relative paths share one pool. Each
+# pool entry is a (connection, cursor) pair so the cursor and sqlite3's
+# statement cache stay with their connection. They are closed at exit.
+_POOL_SIZE = 4
+_POOL = {}
+_POOL_LOCK = threading.Lock()
+
+# Book key -> UCI move lookups each engine keeps, oldest evicted first
+_DB_CACHE_SIZE = 4096
+
+def _open_ro(path):
+    # the book never changes while engines run: immutable=1 lets SQLite skip
+    # file locking and the -wal/-shm lookups on every open
+    uri = f'file:{path}?mode=ro&immutable=1'
+    # allow cross-thread usage; connections move between threads via the pool
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False, timeout=30,
+                           cached_statements=64)
+    # query-only, larger page cache and mmap'd reads for the hot lookup path
+    for pragma in ('PRAGMA query_only = ON;', 'PRAGMA cache_size = -8192;',
+                   'PRAGMA temp_store = MEMORY;', 'PRAGMA mmap_size = 134217728;'):
+        try:
+            conn.execute(pragma)
+        except Exception:
+            pass
+    return conn
+
+def _get_pool(path):
+    with _POOL_LOCK:
+        pool = _POOL.get(path)
+        if pool is None:
+            pool = queue.Queue()
+            try:
+                for _ in range(_POOL_SIZE):
+                    conn = _open_ro(path)
+                    pool.put((conn, conn.cursor()))
+            except Exception:
+                # the pool never reaches _POOL: close what was opened so far
+                while not pool.empty():
+                    pool.get_nowait()[0].close()
+                raise
+            _POOL[path] = pool
+        return pool
+
+@atexit.register
+def _close_pools():
+    with _POOL_LOCK:
+        for pool in _POOL.values():
+            while True:
+                try:
+                    conn, _ = pool.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+        _POOL.clear()
+
+# .bin books: (uint64 zobrist, uint16 move) records sorted by key, written by
+# scripts/build_opening_book.py --bin
+_BIN_RECORD = struct.Struct('<QH')
+
+class _BinKeys:
+    """Sequence view over the sorted keys of a memory-mapped .bin book, for bisect."""
+    def __init__(self, mm):
+        self._mm = mm
+        self._n = len(mm) // _BIN_RECORD.size
+
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, i):
+        return _BIN_RECORD.unpack_from(self._mm, i * _BIN_RECORD.size)[0]
+
+def _decode_move(m):
+    # polyglot-style layout: to | from << 6 | promotion << 12
+    promo = (m >> 12) & 0x7
+    return chess.Move((m >> 6) & 0x3F, m & 0x3F, promotion=promo + 1 if promo else None)
+
+def _encode_move(move):
+    """Pack a move into the polyglot-style 16 bit layout: to | from << 6 | promotion << 12."""
+    promo = move.promotion - 1 if move.promotion else 0
+    return move.to_square | (move.from_square << 6) | (promo << 12)
+
+def _json_to_bin(json_path, bin_path):
+    """Convert a legacy FEN -> UCI JSON book into the sorted .bin layout."""
+    opener = gzip.open if json_path.lower().endswith('.gz') else open
+    with opener(json_path, 'rt', encoding='utf-8') as f:
+        book = json.load(f)
+    records = {}
+    for key, uci in book.items():
+        try:
+            if key.lstrip('-').isdigit():
+                h = int(key) & 0xFFFFFFFFFFFFFFFF
+            else:
+                fields = key.split()
+                h = chess.polyglot.zobrist_hash(chess.Board(' '.join(fields[:4]) + ' 0 1'))
+            records[h] = _encode_move(chess.Move.from_uci(uci))
+        except Exception:
+            # skip entries that do not describe a valid position/move
+            continue
+    # the JSON dict is only needed for the conversion
+    del book
+    _write_bin(records, bin_path)
+
+def _refresh_bin(json_path, bin_path):
+    """(Re)build bin_path from a JSON book unless it is already up to date."""
+    if not os.path.exists(bin_path) or os.path.getmtime(bin_path) < os.path.getmtime(json_path):
+        _json_to_bin(json_path, bin_path)
+
+def _user_cache_bin(json_path):
+    """Per-user cache path for the .bin copy of a JSON book, keyed by its real path."""
+    cache_dir = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    digest = hashlib.sha1(os.path.realpath(json_path).encode('utf-8')).hexdigest()[:16]
+    name = os.path.basename(json_path).split('.')[0]
+    os.makedirs(os.path.join(cache_dir, 'weak-chess-engines'), exist_ok=True)
+    return os.path.join(cache_dir, 'weak-chess-engines', f'{name}-{digest}.bin')
+
+def _write_bin(records, bin_path):
+    """Write a zobrist -> packed move dict as a sorted .bin book."""
+    # write to a temp file first so a concurrent reader never maps a partial book
+    tmp_path = f'{bin_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as out:
+        for h in sorted(records):
+            out.write(_BIN_RECORD.pack(h, records[h]))
+    os.replace(tmp_path, bin_path)
+
+class _BookEngineMixin:
+    """Book lookup shared by the opening book engines.
+
+    Engines set BOOK_STEM (book file name without extension), BOOK_TABLE
+    (table of the sqlite book) and LOG_PREFIX, and call _init_book() once
+    BaseUCIEngine.__init__ has run.
+    """
+    BOOK_STEM = None
+    BOOK_TABLE = None
+    LOG_PREFIX = None
+
+    def _init_book(self, book_path=None):
+        self._pool = None
+        self._int_keys = False
+        self._sql = None
+        self._mm = None
+        self._bin_keys = None
+        # closes the mapping once close() is called or the engine is collected
+        self._finalize = None
+        # last (position, book key) pair, reused while the position is unchanged
+        self._last_key = None
+        # per-instance LRU of book key -> UCI move, so hot positions skip
+        # SQLite; a plain dict, as lru_cache over a bound method would keep
+        # the engine alive through a reference cycle until the next GC pass
+        self._db_cache = OrderedDict()
+        # an explicit file path is loaded as is (load_book reports what it
+        # cannot read); a directory, or the package book folder by default, is
+        # searched for the book preferring .bin, then sqlite DB, then json.gz
+        if book_path and not os.path.isdir(book_path):
+            self.load_book(book_path)
+            return
+        book_dir = book_path or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'book')
+        bin_path = os.path.join(book_dir, self.BOOK_STEM + '.bin')
+        db_path = os.path.join(book_dir, self.BOOK_STEM + '.db')
+        candidates = [bin_path, db_path, os.path.join(book_dir, self.BOOK_STEM + '.json.gz')]
+        if (os.path.exists(bin_path) and os.path.exists(db_path)
+                and os.path.getmtime(bin_path) < os.path.getmtime(db_path)):
+            # a .db rebuilt without --bin leaves an older .bin behind: skip it
+            print(f"[{self.LOG_PREFIX}] Ignoring {bin_path}: older than {db_path}", file=sys.stderr)
+            candidates.remove(bin_path)
+        for candidate in candidates:
+            if os.path.exists(candidate):
+                self.load_book(candidate)
+                return
+        if book_path:
+            # treat provided path as a file path (will be handled by load_book)
+            self.load_book(book_path)
+        # no default book available; remain quiet
+
+    def load_book(self, path):
+        # support these modes:
+        #  - gzipped JSON (.json.gz) -> converted once to a cached .bin (legacy)
+        #  - plain JSON (.json) -> converted once to a cached .bin (legacy)
+        #  - sqlite DB (.db) -> open readonly DB and query per-lookup
+        #  - sorted records (.bin) -> mmap and binary search per-lookup
+        self._last_key = None
+        self._db_cache.clear()
+        # tear down the previous book's backend so lookups never fall back to it
+        if self._finalize is not None:
+            self._finalize()
+            self._finalize = None
+        self._mm = None
+        self._bin_keys = None
+        self._pool = None
+        self._int_keys = False
+        self._sql = None
+        try:
+            lower = path.lower()
+            if lower.endswith('.bin'):
+                # map the sorted record file; lookups binary search the mapping
+                with open(path, 'rb') as f:
+                    self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._finalize = weakref.finalize(self, self._mm.close)
+                self._bin_keys = _BinKeys(self._mm)
+                return
+            if lower.endswith('.json.gz') or lower.endswith('.json'):
+                # convert once to a .bin book next to the source, then map that;
+                # a read-only book folder gets its .bin in the user's cache instead
+                stem = path[:-len('.json.gz')] if lower.endswith('.json.gz') else path[:-len('.json')]
+                bin_path = stem + '.bin'
+                try:
+                    _refresh_bin(path, bin_path)
+                except OSError as e:
+                    print(f"[{self.LOG_PREFIX}] Cannot write {bin_path} ({e}), using the user cache", file=sys.stderr)
+                    bin_path = _user_cache_bin(path)
+                    _refresh_bin(path, bin_path)
+                self.load_book(bin_path)
+                return
+            if lower.endswith('.db'):
+                # borrow from the process-wide read-only pool for this file
+                try:
+                    self._pool = _get_pool(os.path.realpath(path))
+                    # books built with --zobrist store INTEGER keys; older books
+                    # are keyed by the normalized FEN text
+                    with self._borrow() as cur:
+                        cols = cur.execute(f'PRAGMA table_info({self.BOOK_TABLE})').fetchall()
+                    self._int_keys = any(c[1] == 'hash' and c[2].upper() == 'INTEGER' for c in cols)
+                    self._sql = f'SELECT move FROM {self.BOOK_TABLE} WHERE hash = ?'
+                except Exception as e:
+                    print(f"[{self.LOG_PREFIX}] Failed to open sqlite DB {path}: {e}", file=sys.stderr)
+                    self._pool = None
+                return
+            # no other formats supported
+            raise ValueError(f"Unsupported book format: {path}")
+        except Exception as e:
+            print(f"[{self.LOG_PREFIX}] Failed to load book from {path}: {e}", file=sys.stderr)
+            self._pool = None
+
+    @contextlib.contextmanager
+    def _borrow(self):
+        conn, cur = self._pool.get()
+        try:
+            yield cur
+        finally:
+            self._pool.put((conn, cur))
+
+    def _query_db(self, key):
+        with self._borrow() as cur:
+            cur.execute(self._sql, (key,))
+            row = cur.fetchone()
+        return row[0] if row else None
+
+    def _db_lookup(self, key):
+        cache = self._db_cache
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+        move_uci = cache[key] = self._query_db(key)
+        if len(cache) > _DB_CACHE_SIZE:
+            cache.popitem(last=False)
+        return move_uci
+
+    def _bin_lookup(self):
+        h = chess.polyglot.zobrist_hash(self.board)
+        i = bisect.bisect_left(self._bin_keys, h)
+        if i < len(self._bin_keys) and self._bin_keys[i] == h:
+            return _decode_move(_BIN_RECORD.unpack_from(self._mm, i * _BIN_RECORD.size)[1])
+        return None
+
+    def _book_key(self):
+        # repeated lookups of the same position (ponder, info) reuse the last key
+        pos = self.board._transposition_key()
+        if self._last_key is not None and self._last_key[0] == pos:
+            return self._last_key[1]
+        # Zobrist keyed books avoid rebuilding the FEN string on every lookup
+        if self._int_keys:
+            key = _signed_zobrist(self.board)
+        else:
+            # EPD is the normalized FEN (first 4 fields) the builder keys on
+            key = self.board.epd()
+        self._last_key = (pos, key)
+        return key
+
+    def get_best_move(self, think_time: float = 1.0):
+        move_uci = None
+        move = None
+        if self._bin_keys is not None:
+            move = self._bin_lookup()
+        elif self._pool:
+            try:
+                move_uci = self._db_lookup(self._book_key())
+            except Exception as e:
+                print(f"[{self.LOG_PREFIX}] SQLite lookup error: {e}", file=sys.stderr)
+
+        if move_uci:
+            try:
+                move = chess.Move.from_uci(move_uci)
+            except Exception as e:
+                print(f"[{self.LOG_PREFIX}] Failed to parse move from UCI '{move_uci}': {e}", file=sys.stderr)
+                move = None
+
+        if move is not None and move in self.board.legal_moves:
+            return move
+
+        # fallback random
+        legal = list(self.board.legal_moves)
+        if not legal:
+            return None
+        return random.choice(legal)
+
+    def close(self):
+        """Release the pooled DB connections. Safe to call multiple times."""
+        # pooled connections are shared with other instances; just drop our handle
+        self._pool = None
+        self._db_cache.clear()
+        self._bin_keys = None
+        self._mm = None
+        if self._finalize is not None:
+            self._finalize()
@@ -24,7 +24,8 @@ class AntiPositionalEngine(BaseUCIEngine):
     def get_best_move(self, think_time: float) -> Optional[chess.Move]:
         """Choose moves that violate good chess principles."""
         # Simulate thinking time
-        time.sleep(min(think_time, 0.4))
+        if think_time > 0:
+            time.sleep(min(think_time, 0.4))
         
         if self.stop_thinking:
             return None
@@ -32,6 +33,8 @@ class AntiPositionalEngine(BaseUCIEngine):
         legal_moves = list(self.board.legal_moves)
         if not legal_moves:
             return None
+        if len(legal_moves) == 1:
+            return legal_moves[0]
         
         # Categorize moves by how anti-positional they are
         anti_positional_moves = []
@@ -52,6 +52,8 @@ class BlunderEngine(BaseUCIEngine):
         legal_moves = list(self.board.legal_moves)
         if not legal_moves:
             return None
+        if len(legal_moves) == 1:
+            return legal_moves[0]
         
         # If very little time, just return a random move
         if think_time < 0.1:
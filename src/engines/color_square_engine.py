@@ -17,12 +17,15 @@ class ColorSquareEngine(BaseUCIEngine):
 
     def get_best_move(self, think_time: float):
         import random
-        time.sleep(min(think_time, 0.2))
+        if think_time > 0:
+            time.sleep(min(think_time, 0.2))
         if self.stop_thinking:
             return None
         legal_moves = list(self.board.legal_moves)
         if not legal_moves:
             return None
+        if len(legal_moves) == 1:
+            return legal_moves[0]
         # Determine our color
         my_color = self.board.turn
         # White wants pieces on white squares, black on black squares
@@ -23,6 +23,8 @@ class CriminalEngine(BaseUCIEngine):
         legal = list(self.board.legal_moves)
         if not legal:
             return None
+        if len(legal) == 1:
+            return legal[0]
 
         best_moves = []
         best_score = None
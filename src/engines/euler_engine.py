@@ -25,7 +25,8 @@ class EulerEngine(BaseUCIEngine):
     def get_best_move(self, think_time: float) -> Optional[chess.Move]:
         """Return move based on e's fractional part mapped to move list."""
         # Simulate some thinking time
-        time.sleep(min(think_time, 0.2))
+        if think_time > 0:
+            time.sleep(min(think_time, 0.2))
         
         if self.stop_thinking:
             return None
@@ -33,6 +34,8 @@ class EulerEngine(BaseUCIEngine):
         legal_moves = list(self.board.legal_moves)
         if not legal_moves:
             return None
+        if len(legal_moves) == 1:
+            return legal_moves[0]
         
         num_moves = len(legal_moves)
         
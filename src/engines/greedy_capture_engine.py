@@ -34,7 +34,8 @@ class GreedyCaptureEngine(BaseUCIEngine):
     def get_best_move(self, think_time: float) -> Optional[chess.Move]:
         """Always capture the highest value piece if possible."""
         # Simulate some thinking time
-        time.sleep(min(think_time, 0.2))
+        if think_time > 0:
+            time.sleep(min(think_time, 0.2))
         
         if self.stop_thinking:
             return None
@@ -42,6 +43,8 @@ class GreedyCaptureEngine(BaseUCIEngine):
         legal_moves = list(self.board.legal_moves)
         if not legal_moves:
             return None
+        if len(legal_moves) == 1:
+            return legal_moves[0]
         
         # Find all capture moves
         capture_moves = []
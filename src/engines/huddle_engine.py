@@ -17,35 +17,38 @@ class HuddleEngine(BaseUCIEngine):
 
     def get_best_move(self, think_time: float):
         import random
-        time.sleep(min(think_time, 0.2))
+        if think_time > 0:
+            time.sleep(min(think_time, 0.2))
         if self.stop_thinking:
             return None
         legal_moves = list(self.board.legal_moves)
         if not legal_moves:
             return None
+        if len(legal_moves) == 1:
+            return legal_moves[0]
         my_color = self.board.turn
         # Find king square
-        king_square = None
-        for square in chess.SQUARES:
-            piece = self.board.piece_at(square)
-            if piece and piece.piece_type == chess.KING and piece.color == my_color:
-                king_square = square
-                break
+        king_square = self.board.king(my_color)
         if king_square is None:
             # Should not happen in normal chess
             king_square = 4 if my_color == chess.WHITE else 60  # E1 or E8
+        dist_from_king = tuple(chess.square_distance(king_square, sq) for sq in chess.SQUARES)
         # Score moves by minimizing average distance from king to own pieces
         def avg_distance(board):
-            own_squares = [sq for sq in chess.SQUARES if board.piece_at(sq) and board.piece_at(sq).color == my_color]
-            if not own_squares:
-                return 0
-            return sum(chess.square_distance(king_square, sq) for sq in own_squares) / len(own_squares)
+            total = 0
+            n = 0
+            for sq in chess.scan_reversed(board.occupied_co[my_color]):
+                total += dist_from_king[sq]
+                n += 1
+            return total / n if n else 0
         best_score = float('inf')
         best_moves = []
         for move in legal_moves:
-            test_board = self.board.copy()
-            test_board.push(move)
-            score = avg_distance(test_board)
+            self.board.push(move)
+            try:
+                score = avg_distance(self.board)
+            finally:
+                self.board.pop()
             if score < best_score:
                 best_score = score
                 best_moves = [move]
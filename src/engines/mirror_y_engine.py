@@ -50,11 +50,14 @@ class MirrorYEngine(BaseUCIEngine):
 
     def get_best_move(self, think_time: float):
         # small think
-        time.sleep(min(think_time, 0.1))
+        if think_time > 0:
+            time.sleep(min(think_time, 0.1))
 
         legal_moves = list(self.board.legal_moves)
         if not legal_moves:
             return None
+        if len(legal_moves) == 1:
+            return legal_moves[0]
 
         # Mirror the current board (which is the position after opponent moved)
         target = self.mirror_board(self.board)
@@ -17,6 +17,10 @@ class MoverEngine(BaseUCIEngine):
         # square visit counts keyed by square
         self.square_visit_counts = {}  # square -> visit count
 
+    def on_new_game(self):
+        # piece ids and move counts are rebuilt every move; visit counts are not
+        self.square_visit_counts = {}
+
     def get_best_move(self, think_time: float = 1.0):
         board = self.board
         # Rebuild ids and counts from full move history so earlier moves (made by any side) are counted
@@ -17,38 +17,37 @@ class OppositeColorSquareEngine(BaseUCIEngine):
 
     def get_best_move(self, think_time: float):
         import random
-        time.sleep(min(think_time, 0.2))
+        if think_time > 0:
+            time.sleep(min(think_time, 0.2))
         if self.stop_thinking:
             return None
         legal_moves = list(self.board.legal_moves)
         if not legal_moves:
             return None
+        if len(legal_moves) == 1:
+            return legal_moves[0]
         # Determine our color
         my_color = self.board.turn
         # White wants pieces on black squares, black on white squares
-        def is_white_square(square):
-            rank = chess.square_rank(square)
-            file = chess.square_file(square)
-            # In python-chess, A1 is black, so white squares are (rank + file) % 2 == 1
-            return (rank + file) % 2 == 1
-
-        def is_opposite_color_square(square):
-            is_white = is_white_square(square)
-            return not is_white if my_color == chess.WHITE else is_white
-        # Score moves by how many pieces end up on opposite color squares
+        target = chess.BB_DARK_SQUARES if my_color == chess.WHITE else chess.BB_LIGHT_SQUARES
+        # Score moves by how many pieces end up on opposite color squares.
+        # Only the moving piece changes our occupancy (captures remove enemy
+        # pieces), so derive the count from the current one; castling also
+        # moves a rook and is replayed instead.
+        on_target = chess.popcount(self.board.occupied_co[my_color] & target)
         best_score = -float('inf')
         best_moves = []
         for move in legal_moves:
-            test_board = self.board.copy()
-            test_board.push(move)
-            score = 0
-            for square in chess.SQUARES:
-                piece = test_board.piece_at(square)
-                if piece and piece.color == my_color:
-                    if is_opposite_color_square(square):
-                        score += 1
+            to_on_target = 1 if chess.BB_SQUARES[move.to_square] & target else 0
+            if self.board.is_castling(move):
+                self.board.push(move)
+                score = chess.popcount(self.board.occupied_co[my_color] & target)
+                self.board.pop()
+            else:
+                from_on_target = 1 if chess.BB_SQUARES[move.from_square] & target else 0
+                score = on_target - from_on_target + to_on_target
             # Prefer moves that move a piece onto an opposite color square
-            if is_opposite_color_square(move.to_square):
+            if to_on_target:
                 score += 2
             if score > best_score:
                 best_score = score
@@ -16,65 +16,30 @@ class PassafistEngine(BaseUCIEngine):
         super().__init__("Passafist Engine", "Laurent Aerens")
 
     def get_best_move(self, think_time: float = 0):
-        time.sleep(min(think_time, 0.1))
+        if think_time > 0:
+            time.sleep(min(think_time, 0.1))
         legal_moves = list(self.board.legal_moves)
         if not legal_moves:
             return None
-        # 1. Non-checkmate, non-check, non-capture, non-push moves
-        non_special_moves = []
+        if len(legal_moves) == 1:
+            return legal_moves[0]
+        # Classify every move in a single pass, in the order we prefer them:
+        # 0 quiet, 1 push, 2 capture, 3 check. Checkmate implies check, so
+        # mating moves share the check bucket.
+        buckets = [[] for _ in range(4)]
+        white = self.board.turn == chess.WHITE
         for move in legal_moves:
-            b = self.board.copy()
-            b.push(move)
-            is_checkmate = b.is_checkmate()
-            is_check = b.is_check()
-            is_capture = self.board.is_capture(move)
-            piece = self.board.piece_at(move.from_square)
-            is_push = False
-            if piece:
-                from_rank = chess.square_rank(move.from_square)
-                to_rank = chess.square_rank(move.to_square)
-                if self.board.turn == chess.WHITE and to_rank > from_rank:
-                    is_push = True
-                elif self.board.turn == chess.BLACK and to_rank < from_rank:
-                    is_push = True
-            if not (is_checkmate or is_check or is_capture or is_push):
-                non_special_moves.append(move)
-        if non_special_moves:
-            return random.choice(non_special_moves)
-        # 2. Push moves
-        push_moves = []
-        for move in legal_moves:
-            piece = self.board.piece_at(move.from_square)
-            if piece:
-                from_rank = chess.square_rank(move.from_square)
-                to_rank = chess.square_rank(move.to_square)
-                if self.board.turn == chess.WHITE and to_rank > from_rank:
-                    push_moves.append(move)
-                elif self.board.turn == chess.BLACK and to_rank < from_rank:
-                    push_moves.append(move)
-        if push_moves:
-            return random.choice(push_moves)
-        # 3. Capture moves
-        capture_moves = [m for m in legal_moves if self.board.is_capture(m)]
-        if capture_moves:
-            return random.choice(capture_moves)
-        # 4. Check moves
-        check_moves = []
-        for move in legal_moves:
-            b = self.board.copy()
-            b.push(move)
-            if b.is_check():
-                check_moves.append(move)
-        if check_moves:
-            return random.choice(check_moves)
-        # 5. Checkmate moves
-        checkmate_moves = []
-        for move in legal_moves:
-            b = self.board.copy()
-            b.push(move)
-            if b.is_checkmate():
-                checkmate_moves.append(move)
-        if checkmate_moves:
-            return random.choice(checkmate_moves)
-        # Otherwise, pick any legal move
-        return random.choice(legal_moves)
+            from_rank = chess.square_rank(move.from_square)
+            to_rank = chess.square_rank(move.to_square)
+            if (to_rank > from_rank) if white else (to_rank < from_rank):
+                buckets[1].append(move)
+            elif self.board.is_capture(move):
+                buckets[2].append(move)
+            elif self.board.gives_check(move):
+                buckets[3].append(move)
+            else:
+                buckets[0].append(move)
+        for bucket in buckets:
+            if bucket:
+                return random.choice(bucket)
+        return None
@@ -13,19 +13,24 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from base_engine import BaseUCIEngine, run_engine
 
+# Pi constant with high precision
+PI = 3.14159265358979323846264338327950288419716939937510
+# Pi = 3.14159..., so we use the fractional part (0.14159...)
+PI_FRACTION = PI - int(PI)
+
 
 class PiEngine(BaseUCIEngine):
     """Engine that uses Pi (3.14159265358979...) to select moves."""
     
     def __init__(self):
         super().__init__("Pi Engine", "Laurent Aerens")
-        # Pi constant with high precision
-        self.pi = 3.14159265358979323846264338327950288419716939937510
+        self.pi = PI
     
     def get_best_move(self, think_time: float) -> Optional[chess.Move]:
         """Return move based on Pi's fractional part mapped to move list."""
         # Simulate some thinking time
-        time.sleep(min(think_time, 0.2))
+        if think_time > 0:
+            time.sleep(min(think_time, 0.2))
         
         if self.stop_thinking:
             return None
@@ -33,14 +38,14 @@ class PiEngine(BaseUCIEngine):
         legal_moves = list(self.board.legal_moves)
         if not legal_moves:
             return None
+        if len(legal_moves) == 1:
+            return legal_moves[0]
         
         num_moves = len(legal_moves)
         
         # Use Pi to calculate the index
-        # Pi = 3.14159..., so we use the fractional part (0.14159...)
-        # Multiply by num_moves and round down to get index
-        fractional_part = self.pi - int(self.pi)  # 0.14159...
-        index = int(fractional_part * num_moves)
+        # Multiply its fractional part by num_moves and round down to get index
+        index = int(PI_FRACTION * num_moves)
         
         # Ensure index is within bounds
         index = min(index, num_moves - 1)
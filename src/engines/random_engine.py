@@ -24,7 +24,8 @@ class RandomEngine(BaseUCIEngine):
     def get_best_move(self, think_time: float) -> Optional[chess.Move]:
         """Return a random legal move."""
         # Simulate some thinking time
-        time.sleep(min(think_time, 0.1))
+        if think_time > 0:
+            time.sleep(min(think_time, 0.1))
         
         if self.stop_thinking:
             return None
@@ -23,7 +23,8 @@ class ReverseAlphabeticalEngine(BaseUCIEngine):
     def get_best_move(self, think_time: float) -> Optional[chess.Move]:
         """Return the last move alphabetically by algebraic notation."""
         # Simulate some thinking time
-        time.sleep(min(think_time, 0.2))
+        if think_time > 0:
+            time.sleep(min(think_time, 0.2))
         
         if self.stop_thinking:
             return None
@@ -31,19 +32,16 @@ class ReverseAlphabeticalEngine(BaseUCIEngine):
         legal_moves = list(self.board.legal_moves)
         if not legal_moves:
             return None
+        if len(legal_moves) == 1:
+            return legal_moves[0]
         
-        # Convert moves to algebraic notation and sort
-        move_notations = []
-        for move in legal_moves:
-            # Get the algebraic notation for this move
-            notation = self.board.san(move)
-            move_notations.append((notation, move))
-        
-        # Sort by algebraic notation (alphabetically)
-        move_notations.sort(key=lambda x: x[0])
+        # Sort key is SAN without the check/mate suffix. '+' and '#' sort before
+        # any character that can follow inside a SAN move, so the order matches
+        # full SAN without playing every move out to test for check and mate.
+        notation = getattr(self.board, '_algebraic_without_suffix', self.board.san)
         
         # Return the last move alphabetically (reverse order)
-        return move_notations[-1][1]
+        return max(legal_moves, key=notation)
 
 
 if __name__ == "__main__":
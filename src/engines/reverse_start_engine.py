@@ -11,22 +11,26 @@ from base_engine import BaseUCIEngine
 REVERSE_START_SQUARES = {
     (chess.KING, chess.WHITE): chess.E8,
     (chess.QUEEN, chess.WHITE): chess.D8,
-    (chess.ROOK, chess.WHITE): [chess.A8, chess.H8],
-    (chess.BISHOP, chess.WHITE): [chess.C8, chess.F8],
-    (chess.KNIGHT, chess.WHITE): [chess.B8, chess.G8],
-    (chess.PAWN, chess.WHITE): [chess.A7, chess.B7, chess.C7, chess.D7, chess.E7, chess.F7, chess.G7, chess.H7],
+    (chess.ROOK, chess.WHITE): (chess.A8, chess.H8),
+    (chess.BISHOP, chess.WHITE): (chess.C8, chess.F8),
+    (chess.KNIGHT, chess.WHITE): (chess.B8, chess.G8),
+    (chess.PAWN, chess.WHITE): (chess.A7, chess.B7, chess.C7, chess.D7, chess.E7, chess.F7, chess.G7, chess.H7),
     (chess.KING, chess.BLACK): chess.E1,
     (chess.QUEEN, chess.BLACK): chess.D1,
-    (chess.ROOK, chess.BLACK): [chess.A1, chess.H1],
-    (chess.BISHOP, chess.BLACK): [chess.C1, chess.F1],
-    (chess.KNIGHT, chess.BLACK): [chess.B1, chess.G1],
-    (chess.PAWN, chess.BLACK): [chess.A2, chess.B2, chess.C2, chess.D2, chess.E2, chess.F2, chess.G2, chess.H2],
+    (chess.ROOK, chess.BLACK): (chess.A1, chess.H1),
+    (chess.BISHOP, chess.BLACK): (chess.C1, chess.F1),
+    (chess.KNIGHT, chess.BLACK): (chess.B1, chess.G1),
+    (chess.PAWN, chess.BLACK): (chess.A2, chess.B2, chess.C2, chess.D2, chess.E2, chess.F2, chess.G2, chess.H2),
 }
 
+# Chebyshev distance between every pair of squares: SQUARE_DISTANCE[a][b]
+SQUARE_DISTANCE = tuple(tuple(chess.square_distance(a, b) for b in chess.SQUARES) for a in chess.SQUARES)
+
 def piece_distance(sq, targets):
-    if isinstance(targets, list):
-        return min(chess.square_distance(sq, t) for t in targets)
-    return chess.square_distance(sq, targets)
+    row = SQUARE_DISTANCE[sq]
+    if isinstance(targets, tuple):
+        return min(row[t] for t in targets)
+    return row[targets]
 
 class ReverseStartEngine(BaseUCIEngine):
     """
@@ -38,27 +42,32 @@ class ReverseStartEngine(BaseUCIEngine):
 
     def board_score(self, board: chess.Board, color: bool) -> int:
         score = 0
-        for sq in chess.SQUARES:
-            piece = board.piece_at(sq)
-            if piece and piece.color == color:
-                targets = REVERSE_START_SQUARES.get((piece.piece_type, color))
-                if targets:
-                    score += piece_distance(sq, targets)
+        # only visit occupied squares, one piece type at a time
+        for piece_type in chess.PIECE_TYPES:
+            targets = REVERSE_START_SQUARES[(piece_type, color)]
+            for sq in chess.scan_reversed(board.pieces_mask(piece_type, color)):
+                score += piece_distance(sq, targets)
         return score
 
     def get_best_move(self, think_time: float = 0):
-        time.sleep(min(think_time, 0.1))
+        if think_time > 0:
+            time.sleep(min(think_time, 0.1))
         legal_moves = list(self.board.legal_moves)
         if not legal_moves:
             return None
+        if len(legal_moves) == 1:
+            return legal_moves[0]
         color = self.board.turn
         current_score = self.board_score(self.board, color)
+        if current_score == 0:
+            # already on the reverse start squares, no move can improve
+            return random.choice(legal_moves)
         best_score = current_score
         best_moves = []
         for move in legal_moves:
-            b = self.board.copy()
-            b.push(move)
-            s = self.board_score(b, color)
+            self.board.push(move)
+            s = self.board_score(self.board, color)
+            self.board.pop()
             if s < best_score:
                 best_score = s
                 best_moves = [move]
@@ -10,6 +10,9 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from base_engine import BaseUCIEngine, run_engine
 
+# Chebyshev distance between every pair of squares: SQUARE_DISTANCE[a][b]
+SQUARE_DISTANCE = tuple(tuple(chess.square_distance(a, b) for b in chess.SQUARES) for a in chess.SQUARES)
+
 class RunawayEngine(BaseUCIEngine):
     """Engine that tries to keep its king as far as possible from enemy pieces."""
     def __init__(self):
@@ -17,44 +20,41 @@ class RunawayEngine(BaseUCIEngine):
 
     def get_best_move(self, think_time: float):
         import random
-        time.sleep(min(think_time, 0.2))
+        if think_time > 0:
+            time.sleep(min(think_time, 0.2))
         if self.stop_thinking:
             return None
         legal_moves = list(self.board.legal_moves)
         if not legal_moves:
             return None
+        if len(legal_moves) == 1:
+            return legal_moves[0]
         my_color = self.board.turn
-        # Find king square
-        king_square = None
-        for square in chess.SQUARES:
-            piece = self.board.piece_at(square)
-            if piece and piece.piece_type == chess.KING and piece.color == my_color:
-                king_square = square
-                break
+        king_square = self.board.king(my_color)
         if king_square is None:
-            king_square = 4 if my_color == chess.WHITE else 60  # E1 or E8
-        # Find all enemy piece squares
-        enemy_squares = [sq for sq in chess.SQUARES if self.board.piece_at(sq) and self.board.piece_at(sq).color != my_color]
-        def min_distance(board):
-            # After move, find king and all enemy pieces
-            king_sq = None
-            for sq in chess.SQUARES:
-                piece = board.piece_at(sq)
-                if piece and piece.piece_type == chess.KING and piece.color == my_color:
-                    king_sq = sq
-                    break
-            if king_sq is None:
-                return 0
-            enemy_sq = [sq for sq in chess.SQUARES if board.piece_at(sq) and board.piece_at(sq).color != my_color]
-            if not enemy_sq:
+            return random.choice(legal_moves)
+        # Enemy pieces never move on our turn; a capture only removes one of them
+        enemy_bb = self.board.occupied_co[not my_color]
+        if not enemy_bb:
+            # every move already scores the maximum distance
+            return random.choice(legal_moves)
+        def min_distance(king_sq, enemies):
+            if not enemies:
                 return 64  # Max possible distance
-            return min(chess.square_distance(king_sq, sq) for sq in enemy_sq)
+            row = SQUARE_DISTANCE[king_sq]
+            return min(row[sq] for sq in chess.scan_reversed(enemies))
         best_score = -float('inf')
         best_moves = []
         for move in legal_moves:
-            test_board = self.board.copy()
-            test_board.push(move)
-            score = min_distance(test_board)
+            # After move, find king and all enemy pieces
+            king_sq = move.to_square if move.from_square == king_square else king_square
+            enemies = enemy_bb
+            if self.board.is_capture(move):
+                captured = move.to_square
+                if self.board.is_en_passant(move):
+                    captured += -8 if my_color == chess.WHITE else 8
+                enemies &= ~chess.BB_SQUARES[captured]
+            score = min_distance(king_sq, enemies)
             if score > best_score:
                 best_score = score
                 best_moves = [move]
@@ -5,6 +5,7 @@ This engine creates a shuffling pattern that wastes time and position.
 
 import random
 import time
+from collections import deque
 from typing import Optional, Dict
 import chess
 import sys
@@ -20,13 +21,22 @@ class ShuffleEngine(BaseUCIEngine):
     
     def __init__(self):
         super().__init__("Shuffle Engine", "Laurent Aerens")
-        self.move_history = []  # Track recent moves
-        self.piece_positions = {}  # Track where pieces have been
+        self.move_history = deque(maxlen=10)  # Track recent moves
+        self.piece_positions = {}  # Last squares pieces have been on, keyed by (piece_type << 1) | color
+        # Per-turn lookups for _is_shuffle_move, rebuilt from the last 4 moves
+        self._reverse_pairs = set()  # (from, to) of moves that undo a recent move
+        self._recent_left = set()  # (square, piece_type) a piece recently left
+        self._piece_map = {}
+
+    def on_new_game(self):
+        self.move_history.clear()
+        self.piece_positions.clear()
     
     def get_best_move(self, think_time: float) -> Optional[chess.Move]:
         """Prefer moves that shuffle pieces or repeat positions."""
         # Simulate thinking time
-        time.sleep(min(think_time, 0.3))
+        if think_time > 0:
+            time.sleep(min(think_time, 0.3))
         
         if self.stop_thinking:
             return None
@@ -35,14 +45,19 @@ class ShuffleEngine(BaseUCIEngine):
         if not legal_moves:
             return None
         
-        # Update move history
+        # Update move history (the deque keeps only recent moves)
         if len(self.board.move_stack) > 0:
             last_move = self.board.move_stack[-1]
             self.move_history.append(last_move)
-            # Keep only recent moves
-            if len(self.move_history) > 10:
-                self.move_history.pop(0)
         
+        piece_map = self.board.piece_map()
+        recent_moves = list(self.move_history)[-4:]
+        self._reverse_pairs = {(m.to_square, m.from_square) for m in recent_moves}
+        # the piece that made a recent move is the one still on its target square
+        self._recent_left = {(m.from_square, piece_map[m.to_square].piece_type)
+                             for m in recent_moves if m.to_square in piece_map}
+        self._piece_map = piece_map
+
         # Look for shuffle opportunities
         shuffle_moves = []
         
@@ -58,9 +73,9 @@ class ShuffleEngine(BaseUCIEngine):
         # Otherwise, prefer moves that go to squares we've been to before
         familiar_moves = []
         for move in legal_moves:
-            piece = self.board.piece_at(move.from_square)
+            piece = piece_map.get(move.from_square)
             if piece:
-                piece_key = f"{piece.piece_type}_{piece.color}"
+                piece_key = (piece.piece_type << 1) | piece.color
                 if piece_key in self.piece_positions:
                     if move.to_square in self.piece_positions[piece_key]:
                         familiar_moves.append(move)
@@ -70,17 +85,17 @@ class ShuffleEngine(BaseUCIEngine):
         
         # Record where pieces are going for future shuffling
         move = random.choice(legal_moves)
-        piece = self.board.piece_at(move.from_square)
+        piece = piece_map.get(move.from_square)
         if piece:
-            piece_key = f"{piece.piece_type}_{piece.color}"
-            if piece_key not in self.piece_positions:
-                self.piece_positions[piece_key] = set()
-            self.piece_positions[piece_key].add(move.from_square)
-            self.piece_positions[piece_key].add(move.to_square)
-            
-            # Keep set size manageable
-            if len(self.piece_positions[piece_key]) > 5:
-                self.piece_positions[piece_key] = set(list(self.piece_positions[piece_key])[-5:])
+            piece_key = (piece.piece_type << 1) | piece.color
+            # Keep only the 5 most recently visited squares per piece kind
+            positions = self.piece_positions.get(piece_key)
+            if positions is None:
+                positions = self.piece_positions[piece_key] = deque(maxlen=5)
+            for square in (move.from_square, move.to_square):
+                if square in positions:
+                    positions.remove(square)
+                positions.append(square)
         
         return move
     
@@ -88,29 +103,13 @@ class ShuffleEngine(BaseUCIEngine):
         """Check if this move shuffles a piece back to a recent position."""
         if len(self.move_history) < 2:
             return False
-        
-        # Check if this move undoes a recent move
-        for recent_move in self.move_history[-4:]:  # Check last 4 moves
-            if (move.from_square == recent_move.to_square and 
-                move.to_square == recent_move.from_square):
-                return True
-                
-            # Also check if we're moving back to a square we recently left
-            if move.to_square == recent_move.from_square:
-                piece_now = self.board.piece_at(move.from_square)
-                if piece_now:
-                    # Make the recent move temporarily to check the piece type
-                    try:
-                        self.board.push(recent_move)
-                        piece_then = self.board.piece_at(recent_move.to_square)
-                        self.board.pop()
-                        
-                        if piece_then and piece_now.piece_type == piece_then.piece_type:
-                            return True
-                    except:
-                        pass
-        
-        return False
+
+        # Undoes one of the last 4 moves, or brings the same kind of piece
+        # back to a square one of them left
+        if (move.from_square, move.to_square) in self._reverse_pairs:
+            return True
+        piece = self._piece_map.get(move.from_square)
+        return piece is not None and (move.to_square, piece.piece_type) in self._recent_left
 
 
 if __name__ == "__main__":
@@ -2,116 +2,358 @@ import chess
 import random
 import sys
 import os
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
 
 # Add the parent directory to the path to import base_engine
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from base_engine import BaseUCIEngine
 
+# Upper bound on transposition table entries; the oldest entry is evicted first
+TT_MAX_ENTRIES = 1 << 20
+
+# Transposition table bound types
+TT_EXACT, TT_LOWER, TT_UPPER = 0, 1, 2
+
+# Deepest iteration of the iterative deepening loop, in ply
+MAX_DEPTH = 64
+
+INF = float('inf')
+
+# Score of being checkmated; the remaining depth is added so that quicker
+# mates score higher for the winner and later ones are preferred by the loser
+MATE = 30000
+
+# Scores beyond this are forced mates. The transposition table stores them
+# relative to the node (MATE minus the mate distance) instead of relative to
+# the iteration, so an entry stays valid at any remaining depth
+MATE_BOUND = MATE - MAX_DEPTH
+
+# Root scores this close to the best still count as ties (float material sums)
+TIE_EPS = 1e-9
+
+# Iterations up to this depth always run in-process: they finish faster than
+# the root moves can be handed to worker processes
+PARALLEL_MIN_DEPTH = 3
+
+# Piece values for MVV-LVA capture ordering
+_MVV_LVA_VALUE = {chess.PAWN: 1, chess.KNIGHT: 3, chess.BISHOP: 3, chess.ROOK: 5, chess.QUEEN: 9, chess.KING: 0}
+
+# Position of each piece type in a material count list (kings are not counted)
+_COUNT_INDEX = {chess.PAWN: 0, chess.KNIGHT: 1, chess.BISHOP: 2, chess.ROOK: 3, chess.QUEEN: 4}
+
+def _material_value(counts):
+    """Material value of [pawns, knights, bishops, rooks, queens] counts."""
+    pawns, knights, bishops, rooks, queens = counts
+    return pawns + knights * 3 + bishops * 3.2 + rooks * 4.8 + queens * 9
+
+def _mvv_lva_key(board, move):
+    """Sort key for captures: most valuable victim first, then least valuable attacker."""
+    # en passant leaves the target square empty
+    victim = board.piece_type_at(move.to_square) or chess.PAWN
+    attacker = board.piece_type_at(move.from_square)
+    return -(_MVV_LVA_VALUE[victim] * 10 - _MVV_LVA_VALUE[attacker])
+
+def _score_to_tt(score, depth):
+    """Mate score of a node with `depth` ply left, made relative to that node."""
+    if score >= MATE_BOUND:
+        return score - depth
+    if score <= -MATE_BOUND:
+        return score + depth
+    return score
+
+def _score_from_tt(score, depth):
+    """Inverse of _score_to_tt for a node probed with `depth` ply left."""
+    if score >= MATE_BOUND:
+        return score + depth
+    if score <= -MATE_BOUND:
+        return score - depth
+    return score
+
+# Search state of a worker process, reused by every root move it is given
+_worker_engine = None
+
+# Game the worker's transposition table belongs to
+_worker_game = None
+
+def _search_root_move(fen, move_uci, depth, alpha, deadline, game):
+    """Score one root move in a worker process; None once the deadline passed."""
+    global _worker_engine, _worker_game
+    if _worker_engine is None:
+        _worker_engine = SinglePlayerEngine()
+    if game != _worker_game:
+        # entries of an earlier game say nothing about this one
+        _worker_engine.on_new_game()
+        _worker_game = game
+    board = chess.Board(fen)
+    board.push_uci(move_uci)
+    try:
+        return -_worker_engine._negamax(board, depth - 1, -INF, -alpha, deadline)
+    except TimeoutError:
+        return None
+
 class SinglePlayerEngine(BaseUCIEngine):
-    def __init__(self):
+    def __init__(self, workers: int = 1):
         super().__init__("SinglePlayer", "Laurent Aerens")
+        # position key -> (depth, value, bound type); kept for the whole game
+        self.tt = OrderedDict()
+        # root move -> score from the last completed iteration
+        self.root_scores = {}
+        # processes searching root moves side by side; 1 searches in-process
+        self.workers = max(1, workers)
+        self._executor = None
+        # bumped on every new game so the workers drop their tables too
+        self._game = 0
 
-    def get_best_move(self, think_time: float = 1.0):
-        # Only look ahead 4 ply, always assuming it's our turn
-        best_moves = []
-        best_score = float('-inf')
-        best_opp_value = float('inf')
+    def on_new_game(self):
+        self.tt.clear()
+        self.root_scores.clear()
+        self._game += 1
+
+    def get_best_move(self, think_time: float = 1.0, max_depth: Optional[int] = None):
+        # Iterative deepening with alpha-beta; the opponent answers with its best
+        # reply. Play one of the best moves of the deepest completed iteration.
+        # With max_depth, search exactly that deep whatever the clock says.
         board = self.board
-        # aggressive pruning parameters
-        initial_alpha = float('-inf')
-        for move in board.legal_moves:
+        legal_moves = list(board.legal_moves)
+        if not legal_moves:
+            return None
+        if len(legal_moves) == 1:
+            return legal_moves[0]
+        for move in legal_moves:
             board.push(move)
             # quick checkmate short-circuit
-            if board.is_checkmate():
-                board.pop()
+            mate = board.is_checkmate()
+            board.pop()
+            if mate:
                 return move
-            score, opp_value = self._single_player_search(board, depth=3, alpha=initial_alpha)
+
+        start = time.monotonic()
+        deadline = start + think_time if max_depth is None else None
+        root_ply = len(board.move_stack)
+        best_moves = legal_moves
+        for depth in range(1, (max_depth or MAX_DEPTH) + 1):
+            try:
+                # the first iteration always completes so there is a move to play
+                if self.workers > 1 and depth >= PARALLEL_MIN_DEPTH:
+                    best_moves = self._parallel_root_search(board, legal_moves, depth, deadline)
+                else:
+                    best_moves = self._root_search(board, legal_moves, depth, deadline if depth > 1 else None)
+            except TimeoutError:
+                # unwind the moves the interrupted search left on the board
+                while len(board.move_stack) > root_ply:
+                    board.pop()
+                break
+            # a forced mate either way is already the shortest one: searching
+            # deeper cannot change the choice
+            if abs(max(self.root_scores.values())) >= MATE:
+                break
+            # each iteration costs several times the previous one: don't start
+            # one that has little chance to finish
+            if deadline is not None and time.monotonic() - start > think_time / 2:
+                break
+        return random.choice(best_moves)
+
+    def _root_search(self, board, moves, depth, deadline):
+        # best root moves first, by the previous iteration's scores
+        root_scores = self.root_scores
+        moves.sort(key=lambda move: root_scores.get(move, -INF), reverse=True)
+        scores = {}
+        best_moves = []
+        best_score = -INF
+        for move in moves:
+            board.push(move)
+            # the best score so far is the root alpha; lowering it by TIE_EPS
+            # keeps equally good moves inside the window so they tie exactly,
+            # while worse moves fail low and cost far less to refute
+            score = -self._negamax(board, depth - 1, -INF, -(best_score - TIE_EPS), deadline)
             board.pop()
-            # Prefer maximizing own score, then minimizing opponent value
-            if (score > best_score) or (score == best_score and opp_value < best_opp_value):
+            scores[move] = score
+            if score > best_score:
                 best_score = score
-                best_opp_value = opp_value
                 best_moves = [move]
-            elif score == best_score and opp_value == best_opp_value:
+            elif score == best_score:
                 best_moves.append(move)
-        if not best_moves:
-            return None
-        return random.choice(best_moves)
+        self.root_scores = scores
+        return best_moves
+
+    def _parallel_root_search(self, board, moves, depth, deadline):
+        # Each root move is searched by a worker process. They cannot share a
+        # root alpha as it rises, so they all start from the previous
+        # iteration's best score, lowered by TIE_EPS like in _root_search:
+        # moves that beat it get exact scores, the rest fail low cheaply
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            weakref.finalize(self, self._executor.shutdown, wait=False)
+        alpha = max(self.root_scores.values()) - TIE_EPS if self.root_scores else -INF
+        scores = self._submit_root_moves(board, moves, depth, alpha, deadline)
+        best_score = max(scores.values())
+        if best_score <= alpha:
+            # every move fell below the previous best: only bounds are known
+            scores = self._submit_root_moves(board, moves, depth, -INF, deadline)
+            best_score = max(scores.values())
+        self.root_scores = scores
+        return [move for move in moves if scores[move] == best_score]
 
-    def _single_player_search(self, board, depth, alpha=float('-inf')):
-        """Maximizing-only search with alpha-style pruning using a cheap static estimate.
+    def _submit_root_moves(self, board, moves, depth, alpha, deadline):
+        fen = board.fen()
+        futures = [(move, self._executor.submit(_search_root_move, fen, move.uci(), depth,
+                                                alpha, deadline, self._game))
+                   for move in moves]
+        scores = {}
+        for move, future in futures:
+            score = future.result()
+            if score is None:
+                for _, pending in futures:
+                    pending.cancel()
+                raise TimeoutError
+            scores[move] = score
+        return scores
+
+    def _negamax(self, board, depth, alpha, beta, deadline=None):
+        """Alpha-beta negamax search.
 
         Args:
             board: chess.Board at current node
-            depth: remaining ply (we treat each recursion as our move)
-            alpha: current pruning threshold (best score to beat)
+            depth: remaining ply
+            alpha, beta: search window for the side to move
+            deadline: time.monotonic() value after which the search is abandoned
+
+        Returns: score from the point of view of the side to move
 
-        Returns: (best_score, best_opp_value)
+        Raises: TimeoutError once the deadline has passed
         """
-        if depth == 0 or board.is_game_over():
-            return self._material_score(board), self._opponent_piece_value(board)
-
-        best_score = float('-inf')
-        best_opp_value = float('inf')
-
-        # Move ordering: evaluate a cheap static estimate for each move and sort
-        moves = list(board.legal_moves)
-        def static_estimate_for_move(m):
-            # quick heuristic: material after move (for us) plus small bonus for promotions/check
-            board.push(m)
-            val = self._material_score(board)
+        if depth == 0:
+            return self._evaluate(board)
+        if deadline is not None and time.monotonic() > deadline:
+            raise TimeoutError
+
+        alpha_orig = alpha
+        key = board._transposition_key()
+        entry = self.tt.get(key)
+        if entry is not None and entry[0] >= depth:
+            value = _score_from_tt(entry[1], depth)
+            bound = entry[2]
+            if bound == TT_EXACT:
+                return value
+            if bound == TT_LOWER:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value
+
+        best = -INF
+        if depth == 1:
+            # children are leaves: score each move by the material it wins or
+            # promotes to instead of playing it and recounting
+            for value in self._frontier_values(board):
+                if value > best:
+                    best = value
+                    if best > alpha:
+                        alpha = best
+                        if alpha >= beta:
+                            break
+        else:
+            for move in self._ordered_moves(board, list(board.legal_moves)):
+                board.push(move)
+                value = -self._negamax(board, depth - 1, -beta, -alpha, deadline)
+                board.pop()
+                if value > best:
+                    best = value
+                    if best > alpha:
+                        alpha = best
+                        if alpha >= beta:
+                            break
+        if best == -INF:
+            # no legal move: checkmate, found with more depth left the sooner
+            # it happens; stalemate is a draw whatever the material
             if board.is_check():
-                val += 0.5
-            # very rough upper bound: assume we can gain a bit for remaining depth
-            val += 0.2 * depth
-            board.pop()
-            return val
+                return -(MATE + depth)
+            return 0
 
-        moves.sort(key=static_estimate_for_move, reverse=True)
+        if best <= alpha_orig:
+            bound = TT_UPPER
+        elif best >= beta:
+            bound = TT_LOWER
+        else:
+            bound = TT_EXACT
+        if len(self.tt) >= TT_MAX_ENTRIES:
+            self.tt.popitem(last=False)
+        self.tt[key] = (depth, _score_to_tt(best, depth), bound)
+        return best
 
-        # Aggressive width limits per depth (deeper -> fewer moves)
-        # depth roughly 3 -> allow more moves; depth 1 -> few moves
-        width_by_depth = {3: 8, 2: 6, 1: 4}
-        max_width = width_by_depth.get(depth, 6)
-        moves = moves[:max_width]
+    def _frontier_values(self, board):
+        # Scores of the moves of a node whose children are leaves. Only
+        # captures and promotions change the material, so any other move
+        # scores the static balance; one of them is enough and it is usually
+        # found first, which spares generating the full move list
+        turn = board.turn
+        us = self._material_counts(board, turn)
+        them = self._material_counts(board, not turn)
+        promoting = board.pawns & board.occupied_co[turn] & (chess.BB_RANK_7 if turn == chess.WHITE else chess.BB_RANK_2)
+        for move in board.generate_legal_moves(chess.BB_ALL & ~promoting, chess.BB_ALL & ~board.occupied_co[not turn]):
+            # en passant lands on an empty square but is a capture
+            if not board.is_en_passant(move):
+                yield _material_value(us) - _material_value(them)
+                break
+        for move in board.generate_legal_captures():
+            yield self._material_after(board, move, us, them)
+        for move in board.generate_legal_moves(promoting, chess.BB_ALL & ~board.occupied):
+            yield self._material_after(board, move, us, them)
 
+    def _ordered_moves(self, board, moves):
+        # Staged ordering: MVV-LVA captures, then checks, then quiet moves. The
+        # generator only classifies the quiet moves (gives_check) once every
+        # capture has been searched without a cutoff; the caller has popped its
+        # move by then, so the board is back at this node.
+        captures = []
+        quiet = []
         for move in moves:
-            # static upper bound check: if even the static estimate can't beat alpha, prune
-            static_est = static_estimate_for_move(move)
-            if static_est <= alpha:
-                # very aggressive prune
-                continue
+            (captures if board.is_capture(move) else quiet).append(move)
+        captures.sort(key=lambda move: _mvv_lva_key(board, move))
+        yield from captures
+        checks = []
+        others = []
+        for move in quiet:
+            (checks if board.gives_check(move) else others).append(move)
+        yield from checks
+        yield from others
 
-            board.push(move)
-            # recurse with current alpha (we only prune if child can't beat alpha)
-            score, opp_value = self._single_player_search(board, depth-1, alpha)
-            board.pop()
+    def _evaluate(self, board):
+        # Material balance for the side to move
+        us, them = self._material_both(board)
+        return us - them
 
-            if (score > best_score) or (score == best_score and opp_value < best_opp_value):
-                best_score = score
-                best_opp_value = opp_value
-                # update alpha to the new best (tighten pruning for siblings)
-                if best_score > alpha:
-                    alpha = best_score
+    def _material_both(self, board):
+        # Simple material count for the side to move and its opponent
+        # (pawn 1, knight 3, bishop 3.2, rook 4.8, queen 9)
+        return (_material_value(self._material_counts(board, board.turn)),
+                _material_value(self._material_counts(board, not board.turn)))
 
-            # very aggressive early stop: if we reach a clearly dominant score, return early
-            if best_score >= 1000:  # sentinel for forced mate-like values (unlikely here)
-                break
+    def _material_counts(self, board, color):
+        # piece counts straight from the bitboards, in _COUNT_INDEX order
+        popcount = chess.popcount
+        occ = board.occupied_co[color]
+        return [popcount(board.pawns & occ), popcount(board.knights & occ), popcount(board.bishops & occ),
+                popcount(board.rooks & occ), popcount(board.queens & occ)]
 
-        return best_score, best_opp_value
-
-    def _material_score(self, board):
-        # Simple material count for the side to move
-        values = {chess.PAWN: 1, chess.KNIGHT: 3, chess.BISHOP: 3.2, chess.ROOK: 4.8, chess.QUEEN: 9}
-        score = 0
-        for piece_type in values:
-            score += len(board.pieces(piece_type, board.turn)) * values[piece_type]
-        return score
-
-    def _opponent_piece_value(self, board):
-        values = {chess.PAWN: 1, chess.KNIGHT: 3, chess.BISHOP: 3.2, chess.ROOK: 4.8, chess.QUEEN: 9}
-        opp_color = not board.turn
-        score = 0
-        for piece_type in values:
-            score += len(board.pieces(piece_type, opp_color)) * values[piece_type]
-        return score
+    def _material_after(self, board, move, us, them):
+        # Material balance for the mover after a capture and/or promotion,
+        # derived from the counts before it; same sums as a recount, so the
+        # scores are identical
+        us = us[:]
+        them = them[:]
+        if board.is_en_passant(move):
+            them[0] -= 1
+        else:
+            victim = board.piece_type_at(move.to_square)
+            if victim is not None:
+                them[_COUNT_INDEX[victim]] -= 1
+        if move.promotion:
+            us[0] -= 1
+            us[_COUNT_INDEX[move.promotion]] += 1
+        return _material_value(us) - _material_value(them)
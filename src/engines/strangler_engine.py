@@ -1,4 +1,5 @@
 import chess
+from itertools import islice
 from base_engine import BaseUCIEngine
 
 class StranglerEngine(BaseUCIEngine):
@@ -7,13 +8,21 @@ class StranglerEngine(BaseUCIEngine):
 
     def get_best_move(self, think_time: float = 1.0):
         best_move = None
-        min_opponent_moves = float('inf')
+        min_opponent_moves = None
         board = self.board
-        for move in board.legal_moves:
+        legal_moves = list(board.legal_moves)
+        if len(legal_moves) == 1:
+            return legal_moves[0]
+        for move in legal_moves:
             board.push(move)
-            opponent_moves = len(list(board.legal_moves))
+            # a move only wins with strictly fewer replies than the best so
+            # far, so stop generating them once that many have been seen
+            opponent_moves = len(list(islice(board.generate_legal_moves(), min_opponent_moves)))
             board.pop()
-            if opponent_moves < min_opponent_moves:
+            if min_opponent_moves is None or opponent_moves < min_opponent_moves:
                 min_opponent_moves = opponent_moves
                 best_move = move
+                if opponent_moves == 0:
+                    # checkmate or stalemate: nothing can leave fewer replies
+                    break
         return best_move
@@ -9,6 +9,9 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from base_engine import BaseUCIEngine
 
+# Chebyshev distance between every pair of squares: SQUARE_DISTANCE[a][b]
+SQUARE_DISTANCE = tuple(tuple(chess.square_distance(a, b) for b in chess.SQUARES) for a in chess.SQUARES)
+
 
 class SuicideKingEngine(BaseUCIEngine):
     """Engine that prioritizes moving its king closer to the opponent's king."""
@@ -24,34 +27,39 @@ class SuicideKingEngine(BaseUCIEngine):
         legal_moves = list(self.board.legal_moves)
         if not legal_moves:
             return None
+        if len(legal_moves) == 1:
+            return legal_moves[0]
 
         our_king_square = self.board.king(self.board.turn)
         opponent_king_square = self.board.king(not self.board.turn)
         if our_king_square is None or opponent_king_square is None:
             return legal_moves[0]
 
-        def chebyshev_distance(sq1, sq2):
-            rank1, file1 = chess.square_rank(sq1), chess.square_file(sq1)
-            rank2, file2 = chess.square_rank(sq2), chess.square_file(sq2)
-            return max(abs(rank1 - rank2), abs(file1 - file2))
-
         # Find king moves that get closer
         import random
         king_moves = []
-        best_distance = chebyshev_distance(our_king_square, opponent_king_square)
+        # distances to the enemy king from every square
+        dist_to_opp = SQUARE_DISTANCE[opponent_king_square]
+        best_distance = dist_to_opp[our_king_square]
         min_distance = best_distance
         for move in legal_moves:
             if move.from_square == our_king_square:
-                test_board = self.board.copy()
-                test_board.push(move)
-                new_king_square = test_board.king(self.board.turn)
-                if new_king_square is not None:
-                    dist = chebyshev_distance(new_king_square, opponent_king_square)
-                    if dist < min_distance:
-                        min_distance = dist
-                        king_moves = [move]
-                    elif dist == min_distance:
-                        king_moves.append(move)
+                if self.board.is_castling(move):
+                    # chess960 castling targets the rook square; ask the board
+                    self.board.push(move)
+                    try:
+                        new_king_square = self.board.king(not self.board.turn)
+                    finally:
+                        self.board.pop()
+                else:
+                    # the king lands on the target square
+                    new_king_square = move.to_square
+                dist = dist_to_opp[new_king_square]
+                if dist < min_distance:
+                    min_distance = dist
+                    king_moves = [move]
+                elif dist == min_distance:
+                    king_moves.append(move)
         if king_moves:
             return random.choice(king_moves)
 
@@ -59,22 +67,13 @@ class SuicideKingEngine(BaseUCIEngine):
         # Find squares between our king and enemy king (simple straight line)
         blocking_moves = []
         capture_moves = []
-        # Vector from our king to enemy king
-        rk1, fk1 = chess.square_rank(our_king_square), chess.square_file(our_king_square)
-        rk2, fk2 = chess.square_rank(opponent_king_square), chess.square_file(opponent_king_square)
-        dr = rk2 - rk1
-        df = fk2 - fk1
-        # Only consider direct lines (horizontal, vertical, diagonal)
-        line_squares = []
-        if dr == 0 or df == 0 or abs(dr) == abs(df):
-            step_r = (dr > 0) - (dr < 0)
-            step_f = (df > 0) - (df < 0)
-            r, f = rk1 + step_r, fk1 + step_f
-            while (r, f) != (rk2, fk2):
-                sq = chess.square(f, r)
-                line_squares.append(sq)
-                r += step_r
-                f += step_f
+        # Squares strictly between the kings when they share a line
+        # (horizontal, vertical, diagonal); empty otherwise
+        line_mask = chess.between(our_king_square, opponent_king_square)
+        # The king pawn square (in front of the king): for white one rank up,
+        # for black one rank down
+        pawn_rank = chess.square_rank(our_king_square) + (1 if self.board.turn == chess.WHITE else -1)
+        pawn_square = chess.square(chess.square_file(our_king_square), pawn_rank) if 0 <= pawn_rank <= 7 else None
 
         # Find our pieces in between
         for move in legal_moves:
@@ -82,18 +81,11 @@ class SuicideKingEngine(BaseUCIEngine):
             if self.board.is_capture(move):
                 capture_moves.append(move)
             # If moving a piece that's in the line between kings, prefer it
-            if line_squares and move.from_square in line_squares:
+            if chess.BB_SQUARES[move.from_square] & line_mask:
                 blocking_moves.append(move)
             # If moving the king pawn (pawn in front of king), prefer it
-            if our_king_square is not None:
-                king_rank = chess.square_rank(our_king_square)
-                king_file = chess.square_file(our_king_square)
-                # For white, pawn in front is one rank up; for black, one rank down
-                pawn_rank = king_rank + (1 if self.board.turn == chess.WHITE else -1)
-                if 0 <= pawn_rank <= 7:
-                    pawn_square = chess.square(king_file, pawn_rank)
-                    if move.from_square == pawn_square:
-                        blocking_moves.append(move)
+            if move.from_square == pawn_square:
+                blocking_moves.append(move)
 
         # Prefer captures first
         if capture_moves:
@@ -2,11 +2,12 @@
 SELF_PLAY = False
 import os
 import sys
+import inspect
+import functools
 import subprocess
 import chess
 import chess.engine
 import chess.pgn
-from collections import defaultdict
 
 # List of engine classes (imported directly)
 from src.engines.random_engine import RandomEngine
@@ -69,85 +70,231 @@ ENGINES = [
     ("Paralegal", ParalegalEngine)
 ]
 
-RESULTS = defaultdict(lambda: {"win": 0, "loss": 0, "draw": 0})
-# Pairwise results: (white, black) -> score (+1 white win, 0 draw, -1 black win)
-PAIRWISE = {}
+# Engine name -> index into ENGINES and into the result tables below
+ENGINE_ID = {name: i for i, (name, _) in enumerate(ENGINES)}
+
+# Per-engine totals, indexed by engine id
+WINS = [0] * len(ENGINES)
+LOSSES = [0] * len(ENGINES)
+DRAWS = [0] * len(ENGINES)
+# Pairwise results: PAIRWISE[white][black] -> score (+1 white win, 0 draw, -1 black win)
+PAIRWISE = [[0] * len(ENGINES) for _ in ENGINES]
 
 # Tournament settings
-# No per-move time limit and no maximum move limit - games run until completion
+# No per-move time limit, and by default no maximum move limit - games run
+# until completion unless --max-plies adjudicates them as draws
+
+# Engines that search against the clock play to a fixed depth instead, so
+# results do not depend on the machine's speed or load
+FIXED_DEPTH = {SinglePlayerEngine: 4}
 
 
 
 import csv
+import json
+import time
+import struct
+import shutil
+import multiprocessing
 import argparse
-from concurrent.futures import ProcessPoolExecutor, as_completed
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 
 
-def game_task(white_name, white_class, black_name, black_class):
-    board = chess.Board()
-    game = chess.pgn.Game()
+# Engines built by this worker process, one per (class, color), reused by
+# every game it plays
+_ENGINE_CACHE = {}
+
+def _get_engine(engine_class, color):
+    engine = _ENGINE_CACHE.get((engine_class, color))
+    if engine is None:
+        engine = _ENGINE_CACHE[(engine_class, color)] = engine_class()
+    # drop whatever the engine kept from its previous game
+    engine.on_new_game()
+    return engine
+
+# Engine class -> function asking one of its instances for a move
+_MOVE_CALLERS = {}
+
+def _get_move_caller(engine_class):
+    caller = _MOVE_CALLERS.get(engine_class)
+    if caller is None and engine_class in FIXED_DEPTH:
+        depth = FIXED_DEPTH[engine_class]
+        caller = lambda engine: engine.get_best_move(max_depth=depth)
+        _MOVE_CALLERS[engine_class] = caller
+    if caller is None:
+        try:
+            # binding only self succeeds when think_time has a default
+            inspect.signature(engine_class.get_best_move).bind(None)
+            caller = lambda engine: engine.get_best_move()
+        except TypeError:
+            # engines that still expect a time argument
+            caller = lambda engine: engine.get_best_move(0)
+        _MOVE_CALLERS[engine_class] = caller
+    return caller
+
+def game_pgn(board, white_name, black_name, result):
+    # The PGN is only needed as text once the game is over, so it is built
+    # from the final move stack instead of growing a node per ply
+    game = chess.pgn.Game.from_board(board)
     game.headers["White"] = white_name
     game.headers["Black"] = black_name
-    node = game
+    game.headers["Result"] = result
+    return str(game)
+
+# Per-game log of verbose runs, printed in one call once the game is over
+GAME_LOG = "\nGame: {0} (White) vs {1} (Black)\nResult: {0} (White) vs {1} (Black): {2}"
+
+def game_task(white_name, white_class, black_name, black_class, record_pgn=True, verbose=True, max_plies=None):
+    # Without record_pgn, chess.pgn is never touched and the PGN field is "";
+    # a game reaching max_plies (None for no limit) is adjudicated a draw.
+    # The last field is the seconds spent in the ply loop alone, leaving out
+    # building the engines and loading their books
+    board = chess.Board()
     try:
-        white_engine = white_class()
-        black_engine = black_class()
-        print(f"\nGame: {white_name} (White) vs {black_name} (Black)")
+        white_engine = _get_engine(white_class, chess.WHITE)
+        black_engine = _get_engine(black_class, chess.BLACK)
+        # Engines get the game's own board, once: they undo whatever they push
+        # while searching, so there is no need to hand each of them a copy per ply.
+        white_engine.board = board
+        black_engine.board = board
+        # players[ply & 1] asks the side to move for its move, as the game
+        # starts with White and the turns alternate
+        players = (functools.partial(_get_move_caller(white_class), white_engine),
+                   functools.partial(_get_move_caller(black_class), black_engine))
+        # the ply loop's board methods, looked up once per game
+        outcome_of = board.outcome
+        is_legal = board.is_legal
+        push = board.push
+        ply = 0
+        start = time.perf_counter()
         # Play until the game is over; engines may accept a think_time parameter or not.
-        while not board.is_game_over():
-            if board.turn == chess.WHITE:
-                white_engine.board = board.copy()
-                try:
-                    move = white_engine.get_best_move()
-                except TypeError:
-                    # Fallback for engines that still expect a time argument
-                    move = white_engine.get_best_move(0)
-            else:
-                black_engine.board = board.copy()
-                try:
-                    move = black_engine.get_best_move()
-                except TypeError:
-                    move = black_engine.get_best_move(0)
-            if move is None or move not in board.legal_moves:
+        while True:
+            # one outcome check per ply serves both as loop test and result
+            outcome = outcome_of(claim_draw=False)
+            if outcome is not None or ply == max_plies:
                 break
-            board.push(move)
-            node = node.add_variation(move)
-        outcome = board.outcome()
-        if outcome is None or outcome.result() == "*":
-            result_type = "draw"
-            game.headers["Result"] = "1/2-1/2"
-        elif outcome.winner is None:
+            move = players[ply & 1]()
+            if move is None or not is_legal(move):
+                break
+            push(move)
+            ply += 1
+        seconds = time.perf_counter() - start
+        # no outcome: an engine gave up or played an illegal move, or the
+        # game was cut off at max_plies
+        if outcome is None or outcome.winner is None:
             result_type = "draw"
-            game.headers["Result"] = "1/2-1/2"
+            result = "1/2-1/2"
         elif outcome.winner == chess.WHITE:
             result_type = "white_win"
-            game.headers["Result"] = "1-0"
+            result = "1-0"
         else:
             result_type = "black_win"
-            game.headers["Result"] = "0-1"
-        print(f"Result: {white_name} (White) vs {black_name} (Black): {game.headers['Result']}")
-        return (white_name, black_name, result_type, str(game))
+            result = "0-1"
+        if verbose:
+            print(GAME_LOG.format(white_name, black_name, result))
+        pgn = game_pgn(board, white_name, black_name, result) if record_pgn else ""
+        return (white_name, black_name, result_type, pgn, seconds)
     except Exception as e:
         print(f"Error running engines: {e}")
-        game.headers["Result"] = "1/2-1/2"
-        return (white_name, black_name, "draw", str(game))
-
-tasks = []
-for i, (name1, class1) in enumerate(ENGINES):
-    for j, (name2, class2) in enumerate(ENGINES):
-        if i == j and not SELF_PLAY:
-            continue
-        for color in [chess.WHITE, chess.BLACK]:
-            white_name, white_class = (name1, class1) if color == chess.WHITE else (name2, class2)
-            black_name, black_class = (name2, class2) if color == chess.WHITE else (name1, class1)
-            tasks.append((white_name, white_class, black_name, black_class))
+        pgn = game_pgn(board, white_name, black_name, "1/2-1/2") if record_pgn else ""
+        # an aborted game says nothing about how long the pairing takes
+        return (white_name, black_name, "draw", pgn, 0.0)
+
+def build_tasks(self_play=SELF_PLAY):
+    # Games of one round: every pair of engines plays once with each color
+    tasks = []
+    for i, (name1, class1) in enumerate(ENGINES):
+        for j, (name2, class2) in enumerate(ENGINES):
+            if i == j and not self_play:
+                continue
+            for color in [chess.WHITE, chess.BLACK]:
+                white_name, white_class = (name1, class1) if color == chess.WHITE else (name2, class2)
+                black_name, black_class = (name2, class2) if color == chess.WHITE else (name1, class1)
+                tasks.append((white_name, white_class, black_name, black_class))
+    return tasks
+
+# Games of one round, set by main() and handed to each worker process once by
+# _init_worker; workers look games up here by index, so a task is a single int
+# instead of pickled engine classes
+TASKS = []
+
+# Game results sent back by the workers: white id, black id, result code and
+# seconds the game took
+RESULT_RECORD = struct.Struct("<HHBf")
+RESULT_DRAW, RESULT_WHITE, RESULT_BLACK = 0, 1, 2
+# Result code -> score for the pairwise matrix (+1 white win, 0 draw, -1 black win)
+RESULT_SCORE = (0, 1, -1)
+
+# PGN file this worker process appends its games to, opened by _init_worker;
+# None when the games are not recorded
+_PGN_SHARD = None
+# Whether this worker process logs every game it plays
+_VERBOSE = False
+# Ply count at which this worker's games are adjudicated drawn; None for none
+_MAX_PLIES = None
+
+def _init_worker(tasks, shard_dir, verbose, max_plies):
+    global TASKS, _PGN_SHARD, _VERBOSE, _MAX_PLIES
+    TASKS = tasks
+    _VERBOSE = verbose
+    _MAX_PLIES = max_plies
+    if shard_dir is not None:
+        _PGN_SHARD = open(os.path.join(shard_dir, f"pgn_shard_{os.getpid()}.pgn"), "w")
+
+def game_task_by_index(i):
+    white_name, white_class, black_name, black_class = TASKS[i]
+    record_pgn = _PGN_SHARD is not None
+    white_name, black_name, result_type, pgn, seconds = game_task(white_name, white_class, black_name, black_class, record_pgn, _VERBOSE, _MAX_PLIES)
+    if record_pgn:
+        # Only this process writes to its shard, so no locking is needed; flush
+        # every game because worker processes exit without flushing open files
+        _PGN_SHARD.write(pgn + "\n\n")
+        _PGN_SHARD.flush()
+    # the driver only needs the engine ids, the result and how long the game
+    # took, packed into a few bytes
+    code = RESULT_WHITE if result_type == "white_win" else RESULT_BLACK if result_type == "black_win" else RESULT_DRAW
+    return RESULT_RECORD.pack(ENGINE_ID[white_name], ENGINE_ID[black_name], code, seconds)
+
+# Average seconds per game of each engine, from earlier tournaments; used to
+# start the longest games first
+GAME_COSTS_FILE = ".tournament_cache.json"
+
+def load_game_costs():
+    try:
+        with open(GAME_COSTS_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_game_costs(costs, game_seconds, games_played):
+    # the new average of every engine is blended with the stored one, so a
+    # single unusual run doesn't reorder the schedule on its own
+    for name, seconds, played in zip((name for name, _ in ENGINES), game_seconds, games_played):
+        if played:
+            average = seconds / played
+            costs[name] = (costs[name] + average) / 2 if name in costs else average
+    with open(GAME_COSTS_FILE, "w") as f:
+        json.dump(costs, f, indent=2, sort_keys=True)
+
+def non_negative_int(text):
+    # argparse type for counts where 0 means "no limit"
+    value = int(text)
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, got {value}")
+    return value
 
 # Duplicate tasks for the requested number of rounds
 def main():
+    global TASKS
     parser = argparse.ArgumentParser(description='Run round-robin tournament between weak engines')
     parser.add_argument('--rounds', '-r', type=int, default=1, help='Number of full round-robin rounds to run (default: 1)')
     parser.add_argument('--self-play', type=str, default='false', help='Enable engines to play against themselves (true/false, default: false)')
     parser.add_argument('--workers', '-w', type=int, default=os.cpu_count() or 1, help='Number of worker processes to use (default: all CPUs)')
+    parser.add_argument('--no-pgn', action='store_true', help='Do not record the games to tournament_games.pgn')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Print every game and its result as it finishes')
+    parser.add_argument('--max-plies', type=non_negative_int, default=0, help='Adjudicate games still running after this many plies as draws (default: 0, no limit)')
+    parser.add_argument('--quiet', '-q', action='store_true', help='Do not print the pairwise results matrix (it is still exported to CSV)')
     args = parser.parse_args()
     ROUNDS = max(1, args.rounds)
     SELF_PLAY = args.self_play.lower() == 'true'
@@ -155,96 +302,119 @@ def main():
 
     print(f"Starting round-robin tournament... Rounds: {ROUNDS}, Self-play: {SELF_PLAY}, Workers: {WORKERS}")
 
-    # Store all games for PGN export
-    all_games = []
-
-    # Prepare task list for all rounds
-    all_task_args = [args for _ in range(ROUNDS) for args in tasks]
-    print(f"Starting round-robin tournament with {len(all_task_args)} games ({ROUNDS} rounds, {len(tasks)} games per round)...")
-
-    # Run games in parallel using processes
-    with ProcessPoolExecutor(max_workers=WORKERS) as executor:
-        futures = [executor.submit(game_task, *a) for a in all_task_args]
-        for future in as_completed(futures):
-            white_name, black_name, result_type, game_pgn = future.result()
-            all_games.append(game_pgn)
-            # Update aggregate stats
-            if result_type == "white_win":
-                RESULTS[white_name]["win"] += 1
-                RESULTS[black_name]["loss"] += 1
-                score = 1
-            elif result_type == "black_win":
-                RESULTS[black_name]["win"] += 1
-                RESULTS[white_name]["loss"] += 1
-                score = -1
-            else:
-                RESULTS[white_name]["draw"] += 1
-                RESULTS[black_name]["draw"] += 1
-                score = 0
-
-            # For pairwise matrix, if multiple rounds, accumulate by summing scores
-            key = (white_name, black_name)
-            PAIRWISE[key] = PAIRWISE.get(key, 0) + score
+    TASKS = build_tasks(SELF_PLAY)
+
+    # Workers write the games to one PGN shard each, merged once the pool is done
+    shard_dir = None if args.no_pgn else tempfile.mkdtemp(prefix="tournament_pgn_")
+
+    # Tasks of all rounds, generated as the pool takes them
+    num_games = ROUNDS * len(TASKS)
+    costs = load_game_costs()
+    if costs:
+        # Longest processing time first: with the game costs of earlier runs
+        # the longest games start first, handed out one at a time, so no
+        # worker is left finishing a straggler while the others idle
+        default_cost = sum(costs.values()) / len(costs)
+        def task_cost(i):
+            white_name, _, black_name, _ = TASKS[i]
+            return costs.get(white_name, default_cost) + costs.get(black_name, default_cost)
+        order = sorted(range(len(TASKS)), key=task_cost, reverse=True)
+        task_indices = (i for i in order for _ in range(ROUNDS))
+        chunksize = 1
+        print(f"Scheduling the longest games first, from {GAME_COSTS_FILE}")
+    else:
+        # chunks keep the queue traffic low while leaving enough of them to
+        # balance the load between workers; one pending future per chunk
+        task_indices = (i for _ in range(ROUNDS) for i in range(len(TASKS)))
+        chunksize = max(1, num_games // (WORKERS * 4))
+    print(f"Starting round-robin tournament with {num_games} games ({ROUNDS} rounds, {len(TASKS)} games per round)...")
+
+    # seconds spent in the games of each engine, for the next schedule
+    game_seconds = [0.0] * len(ENGINES)
+
+    # Run games in parallel using processes. Workers fork from a server
+    # process that has imported this script, and with it every engine, once;
+    # spawn would import them again in each worker. Windows only has spawn.
+    try:
+        mp_context = multiprocessing.get_context("forkserver")
+        mp_context.set_forkserver_preload(["__main__"])
+    except ValueError:
+        mp_context = None
+    # the shard directory goes away even when a game or the merge fails
+    try:
+        with ProcessPoolExecutor(max_workers=WORKERS, mp_context=mp_context, initializer=_init_worker, initargs=(TASKS, shard_dir, args.verbose, args.max_plies or None)) as executor:
+            for record in executor.map(game_task_by_index, task_indices, chunksize=chunksize):
+                white_id, black_id, code, seconds = RESULT_RECORD.unpack(record)
+                game_seconds[white_id] += seconds
+                game_seconds[black_id] += seconds
+                # Update aggregate stats
+                if code == RESULT_WHITE:
+                    WINS[white_id] += 1
+                    LOSSES[black_id] += 1
+                elif code == RESULT_BLACK:
+                    WINS[black_id] += 1
+                    LOSSES[white_id] += 1
+                else:
+                    DRAWS[white_id] += 1
+                    DRAWS[black_id] += 1
+
+                # For pairwise matrix, if multiple rounds, accumulate by summing scores
+                PAIRWISE[white_id][black_id] += RESULT_SCORE[code]
+
+        # Export all games as a single PGN file
+        if shard_dir is not None:
+            with open("tournament_games.pgn", "w") as pgnfile:
+                for shard in sorted(os.listdir(shard_dir)):
+                    with open(os.path.join(shard_dir, shard)) as shardfile:
+                        shutil.copyfileobj(shardfile, pgnfile)
+            print("All games exported to tournament_games.pgn")
+    finally:
+        if shard_dir is not None:
+            shutil.rmtree(shard_dir, ignore_errors=True)
 
 
     print("\nTournament complete!\n")
+    # games cut off by --max-plies are shorter than real ones: keep them out
+    # of the schedule of full tournaments
+    if not args.max_plies:
+        save_game_costs(costs, game_seconds, [WINS[i] + LOSSES[i] + DRAWS[i] for i in range(len(ENGINES))])
     print("Engine Rankings (by points):")
 
     # Calculate points: win=1, draw=0.5, loss=0
-    engine_points = {}
-    for name, stats in RESULTS.items():
-        points = stats["win"] * 1 + stats["draw"] * 0.5
-        engine_points[name] = points
+    engine_names = [name for name, _ in ENGINES]
+    points = [WINS[i] + DRAWS[i] * 0.5 for i in range(len(ENGINES))]
 
-    ranking = sorted(RESULTS.items(), key=lambda x: (-engine_points[x[0]], -x[1]["win"], x[1]["loss"]))
-    for name, stats in ranking:
-        points = engine_points[name]
-        print(f"{name:20} | Points: {points:5.1f} | Wins: {stats['win']:3} | Losses: {stats['loss']:3} | Draws: {stats['draw']:3}")
+    # engines that played no game (none, in a full round robin) are left out
+    ranking = sorted((i for i in range(len(ENGINES)) if WINS[i] + LOSSES[i] + DRAWS[i]),
+                     key=lambda i: (-points[i], -WINS[i], LOSSES[i]))
+    # one row per ranked engine, shared by the printout and the CSV
+    ranking_rows = [(engine_names[i], points[i], WINS[i], LOSSES[i], DRAWS[i]) for i in ranking]
+    print("\n".join(f"{name:20} | Points: {pts:5.1f} | Wins: {wins:3} | Losses: {losses:3} | Draws: {draws:3}"
+                    for name, pts, wins, losses, draws in ranking_rows))
 
     # Export results table as CSV (with points)
     with open("tournament_results.csv", "w", newline="") as csvfile:
         writer = csv.writer(csvfile)
         writer.writerow(["Engine", "Points", "Wins", "Losses", "Draws"])
-        for name, stats in ranking:
-            points = engine_points[name]
-            writer.writerow([name, f"{points:.1f}", stats["win"], stats["loss"], stats["draw"]])
+        writer.writerows((name, f"{pts:.1f}", wins, losses, draws) for name, pts, wins, losses, draws in ranking_rows)
     print("Results exported to tournament_results.csv")
 
-    # Export all games as a single PGN file
-    with open("tournament_games.pgn", "w") as pgnfile:
-        for game_pgn in all_games:
-            pgnfile.write(game_pgn + "\n\n")
-    print("All games exported to tournament_games.pgn")
-
-    # Print pairwise results matrix (rows = White, columns = Black)
-    engine_names = [name for name, _ in ENGINES]
-
-    print('\nPairwise Results (rows = White, columns = Black):')
-    header = ['Engine'] + engine_names
-    print(' | '.join(header))
-    print(' | '.join(['---'] * len(header)))
-    for white in engine_names:
-        row = [white]
-        for black in engine_names:
-            if white == black:
-                row.append('')
-            else:
-                val = PAIRWISE.get((white, black), 0)
-                row.append(str(val))
-        print(' | '.join(row))
+    # Print pairwise results matrix (rows = White, columns = Black); the
+    # diagonal stays empty as engines don't play themselves by default
+    pairwise_rows = [[white_name] + [str(score) if white != black else '' for black, score in enumerate(PAIRWISE[white])]
+                     for white, white_name in enumerate(engine_names)]
+    if not args.quiet:
+        print('\nPairwise Results (rows = White, columns = Black):')
+        header = ['Engine'] + engine_names
+        print(' | '.join(header))
+        print(' | '.join(['---'] * len(header)))
+        print('\n'.join(' | '.join(row) for row in pairwise_rows))
 
     # Export pairwise matrix to CSV
     with open('pairwise_results.csv', 'w', newline='') as csvfile:
         writer = csv.writer(csvfile)
         writer.writerow([''] + engine_names)
-        for white in engine_names:
-            row = [white]
-            for black in engine_names:
-                if white == black:
-                    row.append('')
-                else:
-                    row.append(str(PAIRWISE.get((white, black), 0)))
-            writer.writerow(row)
+        writer.writerows(pairwise_rows)
     print('Pairwise results exported to pairwise_results.csv')
 
 